@@ -1,7 +1,8 @@
-from typing import Iterator, Union
+from typing import Iterator, Optional, Union
 from email.utils import format_datetime
 from flask import Response, make_response, render_template
-from datetime import timezone
+from datetime import datetime, timezone
+from functools import lru_cache
 import mimetypes
 
 from arxiv.identifier import Identifier
@@ -43,16 +44,27 @@ def maxage(versioned: bool=False) -> str:
     return f'max-age={CACHE_AGE_SEC_VERSIONED}' if versioned else f'max-age={CACHE_AGE_SEC_UNVERSIONED}'  # sec
 
 
-def add_time_headers(resp: Response, file: FileObj, arxiv_id: Identifier) -> None:
-    """Adds time headers to `resp` given the `file` and `arxiv_id`."""
-    resp.headers["Last-Modified"] = last_modified(file)
+def add_time_headers(resp: Response, file: FileObj, arxiv_id: Identifier,
+                     last_mod: Optional[str] = None) -> None:
+    """Adds time headers to `resp` given the `file` and `arxiv_id`.
+
+    `last_mod` can be passed if the caller already has `last_modified(file)`."""
+    resp.headers["Last-Modified"] = last_mod if last_mod else last_modified(file)
     resp.headers['Cache-Control'] = maxage(arxiv_id.has_version)
 
 
 def last_modified(fileobj: FileObj) -> str:
     """Returns a value for use with HTTP last-Modified."""
-    return format_datetime(fileobj.updated.astimezone(timezone.utc),
-                           usegmt=True)
+    return _http_date(fileobj.updated)
+
+
+@lru_cache(maxsize=8192)
+def _http_date(updated: datetime) -> str:
+    """Formats `updated` for an HTTP header.
+
+    This is cached since popular files are requested repeatedly with the same
+    updated time."""
+    return format_datetime(updated.astimezone(timezone.utc), usegmt=True)
 
 
 def stream_gen(file: FileObj) -> Iterator[bytes]:
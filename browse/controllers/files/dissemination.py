@@ -1,8 +1,10 @@
 """Controller for PDF, source and other downloads."""
 
 import logging
-from pathlib import Path
-from typing import Callable, Optional, Union, List
+import secrets
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, Union, List
 import mimetypes
 
 from arxiv.identifier import Identifier, IdentifierException
@@ -13,12 +15,13 @@ from arxiv.files import fileformat
 
 from browse.controllers.files import last_modified, add_time_headers, \
     download_file_base, maxage, withdrawn, unavailable, not_pdf, no_html,\
-    not_found, bad_id, cannot_build_pdf
+    not_found, bad_id, cannot_build_pdf, stream_gen
 from browse import config
 
-from arxiv.files import FileObj, FileTransform
+from arxiv.files import FileObj, FileTransform, LocalFileObj
 
 from browse.services.html_processing import post_process_html
+from browse.stream.byteranges import parse_ranges, multipart_byteranges_gen, byterange_gen
 
 from browse.services.dissemination import get_article_store
 from browse.services.dissemination.article_store import (
@@ -26,12 +29,22 @@ from browse.services.dissemination.article_store import (
 
 from flask import Response, abort, make_response, render_template, request, current_app, stream_with_context
 from flask_rangerequest import RangeRequest
+from werkzeug.wsgi import wrap_file
 
 
 logger = logging.getLogger(__file__)
 logger.setLevel(logging.INFO)
 
 
+MAX_ID_LENGTH = 2048
+"""Longest id, including any archive, that will be parsed."""
+
+SMALL_RESPONSE_SIZE = 1024 * 1024
+"""Files smaller than this may be read in one go instead of streamed."""
+
+LOCAL_FILE_BUFFER_SIZE = 1024 * 1024
+"""Block size to use when the WSGI server has no `wsgi.file_wrapper`."""
+
 Resp_Fn_Sig = Callable[[FileFormat, FileObj, Identifier, DocMetadata,
                         VersionEntry], Response]
 
@@ -41,7 +54,8 @@ def default_resp_fn(format: Optional[FileFormat],
                     arxiv_id: Identifier,
                     docmeta: Optional[DocMetadata] = None,
                     version: Optional[VersionEntry] = None,
-                    guess_content_type: Optional[bool] = False) -> Response:
+                    guess_content_type: Optional[bool] = False,
+                    read_small: Optional[bool] = False) -> Response:
     """Creates a response with appropriate headers for the `file`.
 
     Parameters
@@ -56,45 +70,143 @@ def default_resp_fn(format: Optional[FileFormat],
         Version of the paper to consider.
     extra: Optional[str], optional
         Any extra after the normal URL path part. For use in anc files or html files.
+    read_small: Optional[bool], optional
+        Read a file smaller than `SMALL_RESPONSE_SIZE` in one go and respond
+        with a Content-Length instead of streaming it.
     """
+    content_type = _content_type(format, file, guess_content_type)
+    # The metadata of a FileObj may not be cheap so get each just once
+    etag, updated, size = file.etag, file.updated, file.size
+    last_mod = last_modified(file)
     resp: Response = Response()
-    if request.method == 'GET' and 'range' in [hk.lower() for hk in request.headers.keys()]:
+    range_header = request.headers.get('Range') if request.method == 'GET' else None
+    if range_header is not None and not _if_range_matches(etag, updated):
+        range_header = None  # the file changed since the client got its part, send all of it
+    ranges = parse_ranges(range_header, size) if range_header else None
+    if ranges and len(ranges) > 1:
+        return _multipart_range_resp(file, arxiv_id, ranges, content_type, etag, last_mod)
+    elif ranges and range_header and ',' in range_header:
+        # Several ranges that were merged into one, RangeRequest would 416 on the header
+        return _single_range_resp(file, arxiv_id, ranges[0], size, content_type, etag, last_mod)
+    elif range_header is not None:
         # Fastly requires Range response to cache large objects (>20MB),
         # Cloud run requires response larger than 20MB to be chunked but Range response will be smaller.
         resp = RangeRequest(file.open('rb'),
-                            etag=file.etag,
-                            last_modified=file.updated,
-                            size=file.size).make_response()
+                            etag=etag,
+                            last_modified=updated,
+                            size=size).make_response()
     else:
         # Cloud run needs chunked for large responses
-        if request.method == "GET":
-            # Flask/werkzeug automatically do Transfer-Encoding: chunked for a file
-            resp = make_response(stream_with_context(iter(file.open("rb"))))
-            # but the unit test client doesn't do that so we force it for those
+        if request.method == "GET" and read_small and size < SMALL_RESPONSE_SIZE:
+            with file.open("rb") as fh:
+                resp = Response(fh.read())  # sets Content-Length
+        elif request.method == "GET":
+            if isinstance(file, LocalFileObj):
+                # Lets the WSGI server use its file_wrapper, ex. sendfile(2),
+                # instead of copying the bytes through python
+                resp = Response(wrap_file(request.environ, file.open("rb"),
+                                          buffer_size=LOCAL_FILE_BUFFER_SIZE),
+                                direct_passthrough=True)
+            elif isinstance(file, FileTransform):
+                # Transforms are done line by line so iterate over lines
+                resp = Response(stream_with_context(iter(file.open("rb"))),
+                                direct_passthrough=True)
+            else:
+                # Fixed size blocks, iterating the file would split binary data on newlines
+                resp = Response(stream_with_context(stream_gen(file)),
+                                direct_passthrough=True)
+            # Werkzeug does Transfer-Encoding: chunked for these without a
+            # Content-Length but the unit test client doesn't so we force it
             # see https://github.com/pallets/flask/issues/5424
             resp.headers["Transfer-Encoding"] = "chunked"
             # Don't set Content-Length, it will disable Transfer-Encoding: chunked
         else:
-            resp.headers["Content-Length"] = str(file.size)
+            resp.headers["Content-Length"] = str(size)
 
-        resp.set_etag(file.etag)
-        resp.headers["Last-Modified"] = last_modified(file)
+        resp.set_etag(etag)
         resp.headers["Accept-Ranges"] = "bytes"
 
 
     resp.headers['Access-Control-Allow-Origin'] = '*'
 
+    if content_type:
+        resp.headers['Content-Type'] = content_type
+    if resp.headers['Content-Type'] == "text/html":
+        resp.headers['Content-Type'] = "text/html; charset=utf-8"
+
+    add_time_headers(resp, file, arxiv_id, last_mod)
+    return resp
+
+
+def _content_type(format: Optional[FileFormat],
+                  file: FileObj,
+                  guess_content_type: Optional[bool] = False) -> Optional[str]:
+    """Gets the content type for a response for `file`."""
     if guess_content_type:
         content_type, _ = mimetypes.guess_type(file.name)
-        if content_type:
-            resp.headers["Content-Type"] = content_type
+        return content_type
+    elif format is not None:
+        return format.content_type
     else:
-        if format and isinstance(format, FileFormat):
-            resp.headers['Content-Type'] = format.content_type
-    if resp.headers['Content-Type'] == "text/html":
-        resp.headers['Content-Type'] = "text/html; charset=utf-8"
+        return None
+
+
+def _if_range_matches(etag: str, updated: datetime) -> bool:
+    """Whether the request's Range applies given its If-Range, if any.
+
+    A client resuming a download sends the ETag or Last-Modified of what it
+    already has. If that no longer matches the file the whole file must be
+    sent, not a range of a different file."""
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return if_range.date == updated.astimezone(timezone.utc).replace(microsecond=0)
+    return True
+
+
+def _single_range_resp(file: FileObj,
+                       arxiv_id: Identifier,
+                       byte_range: Tuple[int, int],
+                       size: int,
+                       content_type: Optional[str],
+                       etag: str,
+                       last_mod: str) -> Response:
+    """Makes a 206 `Response` with one range of `file`."""
+    start, end = byte_range
+    resp = make_response(stream_with_context(byterange_gen(file, start, end)), 206)
+    resp.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    resp.headers["Content-Length"] = str(end - start + 1)
+    if content_type:
+        resp.headers["Content-Type"] = content_type
+    resp.set_etag(etag)
+    resp.headers["Accept-Ranges"] = "bytes"
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    add_time_headers(resp, file, arxiv_id, last_mod)
+    return resp
+
 
-    add_time_headers(resp, file, arxiv_id)
+def _multipart_range_resp(file: FileObj,
+                          arxiv_id: Identifier,
+                          ranges: List[Tuple[int, int]],
+                          content_type: Optional[str],
+                          etag: str,
+                          last_mod: str) -> Response:
+    """Makes a multipart/byteranges `Response` for a request with several ranges.
+
+    PDF viewers often request several ranges at once and this sends them all
+    in a single response."""
+    boundary = secrets.token_hex(16)
+    body = multipart_byteranges_gen(file, ranges,
+                                    content_type or "application/octet-stream",
+                                    boundary)
+    resp = make_response(stream_with_context(body), 206)
+    resp.headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+    resp.headers["Transfer-Encoding"] = "chunked"
+    resp.set_etag(etag)
+    resp.headers["Accept-Ranges"] = "bytes"
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    add_time_headers(resp, file, arxiv_id, last_mod)
     return resp
 
 
@@ -106,10 +218,10 @@ def _src_response(format: FileFormat,
                   extra: Optional[str] = None) -> Response:
     """Download source"""
     resp = default_resp_fn(format, file, arxiv_id, docmeta, version)
-    suffixes = Path(file.name).suffixes
-    if not arxiv_id.is_old_id:
-        suffixes.pop(0)  # get rid of .12345
-    filename = download_file_base(arxiv_id, version) + "".join(suffixes)
+    # Suffixes of the file name, skipping the .12345 of a new id
+    parts = file.name.rpartition('/')[2].split('.')
+    suffixes = "".join(f".{part}" for part in parts[1 if arxiv_id.is_old_id else 2:])
+    filename = download_file_base(arxiv_id, version) + suffixes
     resp.headers["Content-Disposition"] = f"attachment; filename=\"{filename}\""
     return resp
 
@@ -137,6 +249,46 @@ def get_src_resp(arxiv_id_str: str,
     return get_dissemination_resp("e-print", arxiv_id_str, archive, _src_response)
 
 
+def _withdrawn(arxiv_id: Identifier) -> Response:
+    return withdrawn(arxiv_id, arxiv_id.has_version)
+
+
+_CONDITION_RESPONSES: Dict[str, Callable[[Identifier], Response]] = {
+    "ARTICLE_NOT_FOUND": not_found,
+    "VERSION_NOT_FOUND": not_found,
+    "WITHDRAWN": _withdrawn,
+    "NO_SOURCE": _withdrawn,
+    "UNAVAILABLE": unavailable,
+    "NOT_PDF": not_pdf,
+    "NO_HTML": no_html,
+}
+"""Responses for the `str` conditions returned by `ArticleStore.dissemination()`."""
+
+
+@lru_cache(maxsize=4096)
+def _parse_id(arxiv_id_str: str) -> Identifier:
+    """Parses `arxiv_id_str` to an `Identifier`.
+
+    This is cached since the same popular papers are requested repeatedly.
+    Only successful parses are cached, an `IdentifierException` is raised
+    each time. The returned `Identifier` is shared so it must not be
+    modified."""
+    return Identifier(arxiv_id_str)
+
+
+def _validate_and_parse(arxiv_id_str: str, archive: Optional[str] = None) -> Identifier:
+    """Checks and parses the id of a request, with its `archive` if any.
+
+    The lengths are checked before making any new strings. Aborts with a 400
+    for a bad request and raises `IdentifierException` for a bad id."""
+    if len(arxiv_id_str) + (len(archive) + 1 if archive else 0) > MAX_ID_LENGTH:
+        abort(400)
+    arxiv_id_str = f"{archive}/{arxiv_id_str}" if archive else arxiv_id_str
+    if arxiv_id_str.startswith('arxiv/'):
+        abort(400, description="do not prefix non-legacy ids with arxiv/")
+    return _parse_id(arxiv_id_str)
+
+
 def get_dissemination_resp(format: Acceptable_Format_Requests,
                            arxiv_id_str: str,
                            archive: Optional[str] = None,
@@ -146,27 +298,16 @@ def get_dissemination_resp(format: Acceptable_Format_Requests,
 
     The response will include headers and may do a range response.
     """
-    arxiv_id_str = f"{archive}/{arxiv_id_str}" if archive else arxiv_id_str
     try:
-        if len(arxiv_id_str) > 2048:
-            abort(400)
-        if arxiv_id_str.startswith('arxiv/'):
-            abort(400, description="do not prefix non-legacy ids with arxiv/")
-        arxiv_id = Identifier(arxiv_id_str)
+        arxiv_id = _validate_and_parse(arxiv_id_str, archive)
     except IdentifierException as ex:
-        return bad_id(arxiv_id_str, str(ex))
+        return bad_id(f"{archive}/{arxiv_id_str}" if archive else arxiv_id_str, str(ex))
     item = get_article_store().dissemination(format, arxiv_id)
     logger. debug(f"dissemination_for_id(%s) was %s", arxiv_id.idv, item)
-    if not item or item == "VERSION_NOT_FOUND" or item == "ARTICLE_NOT_FOUND":
+    if not item:
         return not_found(arxiv_id)
-    elif item == "WITHDRAWN" or item == "NO_SOURCE":
-        return withdrawn(arxiv_id, arxiv_id.has_version)
-    elif item == "UNAVAILABLE":
-        return unavailable(arxiv_id)
-    elif item == "NOT_PDF":
-        return not_pdf(arxiv_id)
-    elif item == "NO_HTML":
-        return no_html(arxiv_id)
+    elif isinstance(item, str):
+        return _CONDITION_RESPONSES[item](arxiv_id)
     elif isinstance(item, Deleted):
         return bad_id(arxiv_id, item.msg)
     elif isinstance(item, CannotBuildPdf):
@@ -198,7 +339,8 @@ def _html_response(format: FileFormat,
     if docmeta.source_format == 'html' or version.source_flag.html:
         return _html_source_listing_response(file_list, arxiv_id)
     elif isinstance(file_list, FileObj):
-        return default_resp_fn(format, file_list, arxiv_id, docmeta, version, guess_content_type=True)
+        return default_resp_fn(format, file_list, arxiv_id, docmeta, version,
+                               guess_content_type=True, read_small=True)
     else:
         # Not a data error since a non-html-source paper might legitimately not have a latexml HTML
         return unavailable(arxiv_id)
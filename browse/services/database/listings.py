@@ -309,11 +309,11 @@ def get_articles_for_month(
         .subquery()
     )
 
+    current_meta = cat_query.join(meta, meta.document_id==cat_query.c.document_id)
+
     #gets the metadata for applicable documents
     main_query=(session.query(meta, cat_query.c.is_primary)
-        .select_from(
-            cat_query.join(meta, meta.document_id==cat_query.c.document_id)
-            )
+        .select_from(current_meta)
         .filter(meta.is_current == 1)
     )
 
@@ -324,7 +324,12 @@ def get_articles_for_month(
         )
     
     result=rows.all() #get listings to display
-    count=main_query.count() #get total entries 
+    #get total entries, counted without selecting all the metadata columns
+    count=(session.query(func.count(meta.document_id))
+        .select_from(current_meta)
+        .filter(meta.is_current == 1)
+        .scalar()
+    )
     new_listings, cross_listings = _entries_into_monthly_listing_items(result)
 
     if not month: month=1 #yearly listings need a month for datetime
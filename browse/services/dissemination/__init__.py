@@ -1,7 +1,7 @@
 """Service to get PDF and other disseminations of an item."""
 from flask import current_app
 from urllib.parse import urlparse
-import google.cloud.storage as storage
+from browse.services.gs_client import get_storage_client
 
 from browse.services.documents import get_doc_service
 from arxiv.files.object_store import ObjectStore, GsObjectStore, LocalObjectStore
@@ -22,7 +22,7 @@ def get_global_object_store(path: str, global_name: str) -> ObjectStore:
     if store is None:
         uri = urlparse(path)
         if uri.scheme == "gs":
-            gs_client = storage.Client()
+            gs_client = get_storage_client()
             store = GsObjectStore(gs_client.bucket(uri.netloc))
         else:
             store = LocalObjectStore(path)
@@ -7,6 +7,7 @@ import re
 import time
 import typing
 from collections.abc import Callable
+from functools import lru_cache
 from typing import Dict, List, Literal, Optional, Tuple, Union
 from urllib.parse import urlparse
 
@@ -30,7 +31,7 @@ from arxiv.files.key_patterns import (abs_path_current_parent,
                                           ps_cache_ps_path, ps_cache_html_path, latexml_html_path)
 from arxiv.files import FileObj, fileformat
 from .source_store import SourceStore
-import google.cloud.storage as storage
+from browse.services.gs_client import get_storage_client
 from flask import current_app
 
 logger = logging.getLogger(__file__)
@@ -119,6 +120,15 @@ def from_genpdf_location(location: str) -> typing.Tuple[str, str]:
         return uri.netloc, uri.path if uri.path[0] != '/' else uri.path[1:]
     return ("", uri.path)
 
+@lru_cache(maxsize=4)
+def _latexml_store(bucket_name: str) -> GsObjectStore:
+    """Gets a `GsObjectStore` for the LaTeXML conversions bucket.
+
+    This is cached so the GS client and bucket are created once per process
+    and not on each HTML request."""
+    return GsObjectStore(get_storage_client().bucket(bucket_name))
+
+
 def is_genpdf_able(_arxiv_id: Identifier) -> bool:
     """Is genpdf api available for this arxiv_id?"""
 
@@ -456,7 +466,6 @@ class ArticleStore():
                 file_list=list(self.objstore.list(path))
                 return file_list if file_list else "NO_SOURCE"
         else: # latex to html
-            # TODO it may be expensive to recreate the GS Client each time
-            latex_obj_store = GsObjectStore(storage.Client().bucket(current_app.config['LATEXML_BUCKET']))
+            latex_obj_store = _latexml_store(current_app.config['LATEXML_BUCKET'])
             file=latex_obj_store.to_obj(latexml_html_path(arxiv_id, version.version))
             return file if file.exists() else "NO_HTML"
@@ -1,8 +1,7 @@
 """Service to get source for an article."""
 
 import logging
-import re
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 
 from arxiv.identifier import Identifier
 from arxiv.files.fileformat import (FileFormat, docx, dvigz, htmlgz, odf,
@@ -15,10 +14,20 @@ from arxiv.files.object_store import ObjectStore
 from arxiv.files import FileObj
 
 from arxiv.formats import list_ancillary_files
+from flask import g, has_request_context
 
 logger = logging.getLogger(__file__)
 
-src_regex = re.compile(r'.*(\.tar\.gz|\.pdf|\.ps\.gz|\.gz|\.div\.gz|\.html\.gz)')
+SRC_SUFFIXES = ('.tar.gz', '.pdf', '.ps.gz', '.gz', '.dvi.gz', '.html.gz')
+"""Suffixes of the possible source files of a paper."""
+
+_SUFFIX_TO_FORMAT: Dict[str, FileFormat] = {
+    '.ps.gz': psgz,
+    '.pdf': pdf,
+    '.html.gz': htmlgz,
+    '.dvi.gz': dvigz,
+}
+"""Source formats that can be determined from just the file name."""
 
 MAX_ITEMS_IN_PATTERN_MATCH = 1000
 """This uses pattern matching on all the keys in an itmes directory. If
@@ -63,16 +72,48 @@ class SourceStore():
         return bool(self.get_src_for_docmeta(arxiv_id, docmeta))
 
 
+    def _request_cache(self) -> Optional[Dict[Tuple[int, str], Optional[FileObj]]]:
+        """Gets the cache of `get_src` results for the current request.
+
+        Returns `None` when there is no flask request context, an app context
+        alone can last longer than a request."""
+        if not has_request_context():
+            return None
+        cache = getattr(g, '_src_cache', None)
+        if cache is None:
+            cache = {}
+            g._src_cache = cache
+        return cache
+
     def get_src(self, arxiv_id: Identifier, is_current: bool) -> Optional[FileObj]:
+        """Gets the src for `arxiv_id`.
+
+        The result is cached for the duration of the request since the list
+        done to find the source is expensive and several parts of a request
+        may need the source."""
         pattern = src_path_prefix(arxiv_id, is_current)
-        items = list(self.objstore.list(pattern))
+        cache = self._request_cache()
+        key = (id(self), pattern)
+        if cache is not None and key in cache:
+            return cache[key]
+        src = self._list_src(pattern)
+        if cache is not None:
+            cache[key] = src
+        return src
+
+    def _list_src(self, pattern: str) -> Optional[FileObj]:
+        """Finds the source by listing the keys that start with `pattern`.
+
+        The first source in key order is used. GS lists keys in that order,
+        the sort makes other stores match it."""
+        items = sorted(self.objstore.list(pattern), key=lambda item: item.name)
         if len(items) > MAX_ITEMS_IN_PATTERN_MATCH:
             raise Exception(f"Too many src matches for {pattern}")
         if len(items) > .9 * MAX_ITEMS_IN_PATTERN_MATCH:
             logger.warning("Unexpectedly large src matches %d, max is %d",
                            len(items), MAX_ITEMS_IN_PATTERN_MATCH)
 
-        return next((item for item in items if src_regex.match(item.name)), None)
+        return next((item for item in items if item.name.endswith(SRC_SUFFIXES)), None)
 
 
     def get_src_for_version(self, arxiv_id: Identifier, version: VersionEntry) -> Optional[FileObj]:
@@ -97,14 +138,10 @@ class SourceStore():
                                    version: VersionEntry,
                                    src_file: FileObj)-> FileFormat:
         """Gets article's source format as a `FileFormat`."""
-        if src_file.name.endswith(".ps.gz"):
-            return psgz
-        if src_file.name.endswith(".pdf"):
-            return pdf
-        if src_file.name.endswith(".html.gz"):
-            return htmlgz
-        if src_file.name.endswith(".dvi.gz"):
-            return dvigz
+        name = src_file.name
+        for suffix, fmt in _SUFFIX_TO_FORMAT.items():
+            if name.endswith(suffix):
+                return fmt
 
         # Otherwise look at the special info in the metadata for help
         srctype = version.source_flag
@@ -106,4 +106,4 @@ class FsDocMetadataService(DocMetadataService):
     def service_status(self)->List[str]:
         probs = fs_check(self.fs_paths.latest_versions_path)
         probs.extend(fs_check(self.fs_paths.original_versions_path))
-        return ["FsDocMetadataService: {prob}" for prob in probs]
+        return [f"FsDocMetadataService: {prob}" for prob in probs]
@@ -0,0 +1,39 @@
+"""Google Cloud Storage client shared by the services."""
+import threading
+from typing import Optional
+
+import google.auth
+import google.cloud.storage as storage
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = 50
+"""Number of hosts to keep connection pools for."""
+
+POOL_MAXSIZE = 100
+"""Connections to keep open per host.
+
+The default of 10 is lower than the number of concurrent downloads a
+worker can do so connections, and their TLS handshakes, would churn."""
+
+_client: Optional[storage.Client] = None
+_client_lock = threading.Lock()
+
+
+def get_storage_client(pool_maxsize: int = POOL_MAXSIZE) -> storage.Client:
+    """Gets the process wide GS `storage.Client`.
+
+    The client is thread safe so one is shared to reuse its credentials and
+    its pool of connections. `pool_maxsize` is the connections to keep open
+    per host, it is only used by the call that makes the client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+                session = AuthorizedSession(credentials)
+                session.mount("https://", HTTPAdapter(pool_connections=POOL_CONNECTIONS,
+                                                      pool_maxsize=pool_maxsize))
+                _client = storage.Client(project=project, credentials=credentials,
+                                         _http=session)
+    return _client
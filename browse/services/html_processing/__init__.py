@@ -14,6 +14,9 @@ logger.setLevel(logging.INFO)
 
 LAX_ID_REGEX = b'(arXiv:)?([a-z-]+(\.[A-Z][A-Z])?\/\d{7}|\d{4}\.\d{4,5})(v\d+)?'
 
+_LIST_ABS_RE = re.compile(b'(LIST|ABS):(' + LAX_ID_REGEX + b')', re.I)
+_REPORT_NO_RE = re.compile(b'^\s*REPORT-NO:([A-Za-z0-9-\/]+)', re.I)
+
 def post_process_html(byte_line:bytes) -> bytes:
     """Transformes each `byte_line` with the HTML post processing to
     add in any ABS or LIST lines.
@@ -22,10 +25,12 @@ def post_process_html(byte_line:bytes) -> bytes:
     `make_resposne(post_process_html(somefile))` this needs to be used with
     `flask.stream_with_context`.
     """
+    if b':' not in byte_line:  # every directive has a colon
+        return byte_line
     #line=byte_line.decode('utf-8')
     # Match LIST: or ABS: directives followed by an identifier using regular expressions
-    list_match = re.match(b'(LIST|ABS):(' + LAX_ID_REGEX + b')', byte_line, re.I)
-    report_no_match = re.match(b'^\s*REPORT-NO:([A-Za-z0-9-\/]+)', byte_line, re.I)
+    list_match = _LIST_ABS_RE.match(byte_line)
+    report_no_match = _REPORT_NO_RE.match(byte_line) if not list_match else None
     if list_match:
         try:
             cmd = list_match.group(1) #which command to perform
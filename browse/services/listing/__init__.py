@@ -54,8 +54,13 @@ class ListingItem:
     in the arXiv system.
 
     primary is the primary category of the article.
+
+    list_index is set by the controllers for the position of the item on
+    the page.
     """
 
+    __slots__ = ('id', 'listingType', 'primary', 'article', 'list_index')
+
     def __init__(self, id: str,
                  listingType: AnnounceTypes,
                  primary: str,
@@ -65,6 +70,10 @@ class ListingItem:
         self.primary = primary
         self.article = article
 
+    def copy(self) -> 'ListingItem':
+        """Copies the item without its `list_index`."""
+        return ListingItem(self.id, self.listingType, self.primary, self.article)
+
     def __repr__(self) -> str:
         return f"<ListingItem {self.id} {self.listingType}>"
 
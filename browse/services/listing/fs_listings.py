@@ -3,13 +3,20 @@
 Can be either local file or GCP storage.
 """
 
+import dataclasses
 import logging
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
-from typing import List, Literal, Optional, Tuple, Union
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, TypeVar, Union
 from zoneinfo import ZoneInfo
 
-import google.cloud.storage as storage
+from browse.services.gs_client import get_storage_client
 
 from arxiv.taxonomy.definitions import ARCHIVES, CATEGORIES
 from arxiv.base.globals import get_application_config
@@ -21,7 +28,8 @@ from arxiv.files import FileObj
 from arxiv.files.object_store import ObjectStore, GsObjectStore, LocalObjectStore
 from werkzeug.exceptions import BadRequest
 
-from .parse_listing_file import ParsingMode, get_updates_from_list_file
+from .parse_listing_file import (ParsingMode, count_updates_in_list_file,
+                                 get_updates_from_list_file)
 from .parse_listing_pastweek import parse_listing_pastweek
 from .parse_new_listing_file import parse_new_listing_file
 
@@ -32,6 +40,142 @@ ListingFileType = Literal["new", "pastweek", "month"]
 """These are the listing file types."""
 
 
+_CAT_SUFFIX_RE = re.compile(r'([^\.]*)(?P<suffix>\.[^\.]*)$')
+
+
+def _archive_and_suffix(archiveOrCategory: str) -> Tuple[str, str]:
+    if archiveOrCategory in ARCHIVES:
+        # Create listing file path with archive as <archive>/new
+        return archiveOrCategory, ''
+    # Get archive and create path - <archive>/new.<category>
+    res = _CAT_SUFFIX_RE.match(archiveOrCategory)
+    return (CATEGORIES[archiveOrCategory].in_archive,
+            res.group('suffix') if res else '')
+
+
+_ARCHIVE_AND_SUFFIX = {name: _archive_and_suffix(name)
+                       for name in [*ARCHIVES.keys(), *CATEGORIES.keys()]}
+"""`(archive_id, categorySuffix)` of the listing files of each archive and category.
+
+ex. `('math', '.AG')` for math.AG. The taxonomy is static so this is made once."""
+
+
+@lru_cache(maxsize=1024)
+def _listing_root(listing_files_root: str, archiveOrCategory: str) -> Tuple[str, str]:
+    """Gets `(listingRoot, categorySuffix)` for an archive or category.
+
+    ex. `('{listing_files_root}/math/listings/', '.AG')` for math.AG
+
+    This is cached so the root is formatted once for each archive or category."""
+    try:
+        archive_id, categorySuffix = _ARCHIVE_AND_SUFFIX[archiveOrCategory]
+    except KeyError:
+        raise BadRequest(f"Archive or category doesn't exist: {archiveOrCategory}")
+    return f'{listing_files_root}/{archive_id}/listings/', categorySuffix
+
+
+@lru_cache(maxsize=4096)
+def _listing_path(listing_files_root: str, fileMode: ListingFileType,
+                  archiveOrCategory: str, year: int, month: int) -> str:
+    """Formats the key of a listing file.
+
+    This only depends on its arguments so it is cached. A `FileObj` is not
+    cached since it may be for a file that has changed."""
+    listingRoot, categorySuffix = _listing_root(listing_files_root, archiveOrCategory)
+    if fileMode == 'month':
+        if len(str(year)) >= 4:
+            if year < 2090:
+                yy = str(year)[2:]
+                listingFilePath = f'{listingRoot}{yy}{month:02d}'
+            else:
+                listingFilePath = f'{listingRoot}{year}{month:02d}'
+        elif len(str(year)) <= 2:
+            listingFilePath = f'{listingRoot}{year:02d}{month:02d}'
+        else:
+            raise BadRequest(f"Bad year value: year: {year} month: {month:02d}")
+    else:
+        listingFilePath = f'{listingRoot}{fileMode}{categorySuffix}'
+
+    return listingFilePath
+
+
+PARSED_CACHE_ITEMS = 64 * 1024
+"""Total listing items in the parsed results kept in memory.
+
+An item keeps the raw lines or the metadata of its entry so the memory of a
+result is about proportional to its items. A category listing keeps only
+the items of its category so it costs less than the whole file."""
+
+ParsedListing = TypeVar('ParsedListing',
+                        bound=Union[Listing, ListingNew, MonthTotal, NotModifiedResponse])
+
+_parsed_cache: "OrderedDict[Tuple[Any, ...], Tuple[Any, int]]" = OrderedDict()
+_parsed_cache_items = 0
+_parsed_cache_lock = threading.Lock()
+
+
+def _cache_cost(rv: Union[Listing, ListingNew, MonthTotal, NotModifiedResponse]) -> int:
+    """Gets what a parsed result costs in `PARSED_CACHE_ITEMS`."""
+    return 1 + len(rv.listings) if isinstance(rv, (Listing, ListingNew)) else 1
+
+
+def _cached_parse(fobj: FileObj, updated: Optional[datetime],
+                  parse: Callable[..., ParsedListing], *args: Any) -> ParsedListing:
+    """Calls `parse(*args)` and caches the result on the `fobj` key and update time.
+
+    `updated` is the update time of `fobj` or `None` if it does not exist,
+    the callers already have it for their If-Modified-Since checks.
+
+    Listing files are only rewritten by an announce which changes their
+    update time so this will not return a stale result. The `expires` of
+    the result is regenerated since it is relative to the request.
+
+    The result is shared by requests so its items must not be modified, use
+    `_page_items` to get the items of a page."""
+    global _parsed_cache_items
+    if updated is None:
+        return parse(*args)
+    key = (fobj.name, updated, parse.__name__,
+           tuple(arg for arg in args if arg is not fobj))
+    with _parsed_cache_lock:
+        hit = _parsed_cache.get(key)
+        if hit is not None:
+            _parsed_cache.move_to_end(key)
+    if hit is not None:
+        rv: ParsedListing = hit[0]
+    else:
+        rv = parse(*args)
+        cost = _cache_cost(rv)
+        with _parsed_cache_lock:
+            if key not in _parsed_cache:
+                _parsed_cache[key] = (rv, cost)
+                _parsed_cache_items += cost
+            while _parsed_cache_items > PARSED_CACHE_ITEMS and len(_parsed_cache) > 1:
+                _, (_, evicted_cost) = _parsed_cache.popitem(last=False)
+                _parsed_cache_items -= evicted_cost
+    return dataclasses.replace(rv, expires=gen_expires())
+
+
+def _page_items(items: List[ListingItem], skip: int, show: int) -> List[ListingItem]:
+    """Gets copies of the items of a page.
+
+    The controllers set `list_index` and `article` on the items of the page
+    and the items of a parsed listing file are shared by `_parsed_cache`."""
+    return [item.copy() for item in items[skip:skip + show]]
+
+
+STATUS_CACHE_SEC = 30
+"""Seconds to reuse the result of a service status check.
+
+The check lists the bucket and health checks can be frequent."""
+
+_status_cache: Dict[str, Tuple[float, List[str]]] = {}
+
+
+_listing_pool = ThreadPoolExecutor(max_workers=12, thread_name_prefix="listing")
+"""Threads to read the listing files of several months in parallel."""
+
+
 class FsListingFilesService(ListingService):
     """arXiv document listings via Filesystem.
 
@@ -46,7 +190,7 @@ class FsListingFilesService(ListingService):
         
         if document_listing_path.startswith("gs://"):
             parts = document_listing_path.replace("gs://","").split("/")
-            gs_client = storage.Client()
+            gs_client = get_storage_client()
             bucket = gs_client.bucket(parts[0])
             self.obj_store = GsObjectStore(bucket)
             path = "/".join(parts[1:]) if len(parts)>0 else ""
@@ -60,56 +204,53 @@ class FsListingFilesService(ListingService):
 
         This just formats the string file name and returns a `Path`. It does
         not check if the file exists."""
-        categorySuffix = ''
-        archive_id = ''
-        if archiveOrCategory in ARCHIVES:
-            # Create listing file path with archive as <archive>/new
-            archive_id = archiveOrCategory
-        elif archiveOrCategory in CATEGORIES:
-            # Get archive and create path - <archive>/new.<category>
-            res = re.match('([^\\.]*)(?P<suffix>\\.[^\\.]*)$', archiveOrCategory)
-            if res:
-                suffix = res.group('suffix')
-                categorySuffix = suffix
-            archive_id = CATEGORIES[archiveOrCategory].in_archive
-        else:
-            raise BadRequest(f"Archive or category doesn't exist: {archiveOrCategory}")
-
-        listingRoot = f'{self.listing_files_root}/{archive_id}/listings/'
-        if fileMode == 'month':
-            if len(str(year)) >= 4:
-                if year < 2090:
-                    yy = str(year)[2:]
-                    listingFilePath = f'{listingRoot}{yy}{month:02d}'
-                else:
-                    listingFilePath = f'{listingRoot}{year}{month:02d}'
-            elif len(str(year)) <= 2:
-                listingFilePath = f'{listingRoot}{year:02d}{month:02d}'
-            else:
-                raise BadRequest(f"Bad year value: year: {year} month: {month:02d}")
-        else:
-            listingFilePath = f'{listingRoot}{fileMode}{categorySuffix}'
-
-        return self.obj_store.to_obj(listingFilePath)
-
-
-    def _current_y_m_em(self, year:int) -> Tuple[str,int,int]:
-        """Gets `(currentYear, currentMonth, end_month)`"""
+        return self.obj_store.to_obj(_listing_path(self.listing_files_root, fileMode,
+                                                   archiveOrCategory, year, month))
+
+    def _month_files(self, archiveOrCategory: str, year: int, end_month: int)\
+            -> List[Tuple[int, FileObj]]:
+        """Gets `(month, FileObj)` for the existing monthly listing files of `year`.
+
+        The files for a year share a prefix like `listings/21` so this does one
+        list of the bucket or directory instead of checking each month."""
+        first = _listing_path(self.listing_files_root, 'month',
+                              archiveOrCategory, year, 1)
+        existing = {fobj.name.rpartition('/')[2]: fobj
+                    for fobj in self.obj_store.list(first[:-2])}
+        files = []
+        for month in range(1, end_month + 1):
+            key = _listing_path(self.listing_files_root, 'month',
+                                archiveOrCategory, year, month)
+            fobj = existing.get(key.rpartition('/')[2])
+            if fobj is not None:
+                files.append((month, fobj))
+        return files
+
+    def _current_y_m_em(self, year:int) -> Tuple[int,int,int]:
+        """Gets `(currentYear, currentMonth, end_month)`
+
+        `currentYear` is two digits to match the years of the listing files.
+        `year` may be two or four digits."""
+        now = datetime.now()
+        currentYear, currentMonth = now.year % 100, now.month
         # If current year, limit range to available months
-        currentYear = str(datetime.now().year)[2:]
-        currentMonth = datetime.now().month
-        end_month = 12
-        if currentYear == str(year):
-            end_month = currentMonth
+        end_month = currentMonth if year % 100 == currentYear else 12
         return (currentYear, currentMonth, end_month)
 
-    def _modified_since(self, if_modified_since: str, listingFile: FileObj) -> bool:
-        """Returns whether data has been modified since `if_modified_since`."""
-        if not listingFile.exists():
+    def _updated(self, listingFile: FileObj) -> Optional[datetime]:
+        """Gets the update time of `listingFile` or `None` if it does not exist."""
+        return listingFile.updated if listingFile.exists() else None
+
+    def _modified_since(self, since: datetime, updated: Optional[datetime]) -> bool:
+        """Returns whether a file last updated at `updated` is newer than `since`.
+
+        `since` should be the parsed if_modified_since header and `updated`
+        should be from `_updated()`."""
+        if updated is None:
             return False
-        parsed = datetime.strptime(if_modified_since, '%a, %d %b %Y %H:%M:%S GMT')
-        modTime = listingFile.updated
-        return modTime > parsed
+        if updated.tzinfo is None:
+            since = since.replace(tzinfo=None)
+        return updated > since
 
     def _list_articles_by_period(self,
                                  archiveOrCategory: str,
@@ -174,33 +315,42 @@ class FsListingFilesService(ListingService):
         currentYear, currentMonth, end_month = self._current_y_m_em(
             max([yy for yy,_,_ in yymmfiles]))
         
+        # Metadata of each file is looked at once for the checks below and the cache
+        updates = [self._updated(lf) for _, _, lf in yymmfiles]
+
         if if_modified_since: # Check if-modified-since for months of interest
-            if all([not self._modified_since(if_modified_since, lf)
-                    for _,_, lf in yymmfiles]):
+            since = parsedate_to_datetime(if_modified_since)
+            if not any(self._modified_since(since, updated) for updated in updates):
                 return NotModifiedResponse(True, gen_expires())
 
-        # Collect updates for each month
-        all_listings: List[ListingItem] = []
-        all_pubdates: List[Tuple[date,int]] = []
-        for year, month, listingFile in yymmfiles:
-            if not listingFile.exists() and currentYear != str(year)\
-               and currentMonth != str(month):
+        for (year, month, listingFile), updated in zip(yymmfiles, updates):
+            if updated is None and (year % 100, month) != (currentYear, currentMonth):
                 # This is fine if new month and no announce has happened yet.
                 raise Exception(f"Missing monthly listing file {listingFile}")
 
-            response = get_updates_from_list_file(year, month, listingFile,
-                                                  mode, archiveOrCategory)
+        # Read the months in parallel since each may be a round trip to GS
+        def get_updates(yymmfile: Tuple[int, int, FileObj], updated: Optional[datetime])\
+                -> Union[Listing, NotModifiedResponse, MonthTotal]:
+            year, month, listingFile = yymmfile
+            return _cached_parse(listingFile, updated, get_updates_from_list_file,
+                                 year, month, listingFile, mode, archiveOrCategory)
+        if len(yymmfiles) > 1:
+            responses = list(_listing_pool.map(get_updates, yymmfiles, updates))
+        else:
+            responses = [get_updates(yymmfile, updated)
+                         for yymmfile, updated in zip(yymmfiles, updates)]
+
+        # Collect updates for each month
+        all_listings: List[ListingItem] = []
+        all_pubdates: List[Tuple[date,int]] = []
+        for response in responses:
             if not isinstance(response, Listing):
                 return response
-            
-            all_listings.extend(response.listings)            
+            all_listings.extend(response.listings)
             if response.pubdates:
                 all_pubdates.extend(response.pubdates)
-            # else:
-            #     pub_date = date(year, month, 1).strftime('%a, %d %b %Y')
-            #     all_pubdates.append((pub_date, len(response.listings)))
 
-        return Listing(listings=all_listings[skip:skip + show], # Adjust for skip/show
+        return Listing(listings=_page_items(all_listings, skip, show), # Adjust for skip/show
                        pubdates=all_pubdates,
                        count=len(all_listings),
                        expires= gen_expires())
@@ -226,13 +376,8 @@ class FsListingFilesService(ListingService):
         Existing production year list links use two digit year.
         """
         _, _, end_month = self._current_y_m_em(year)
-        months = [(year, month) for month in range(1, end_month + 1)]
-        possible = (
-            (year, month, self._generate_listing_path('month', archiveOrCategory,
-                                                      year, month))
-            for year, month in months)
-        yymmfiles = [(year, month, fobj) for (year, month, fobj) in possible
-                     if fobj.exists()]
+        yymmfiles = [(year, month, fobj) for month, fobj
+                     in self._month_files(archiveOrCategory, year, end_month)]
         return self._list_articles_by_period(archiveOrCategory, yymmfiles, skip,
                                              show, if_modified_since) # type: ignore
 
@@ -274,12 +419,14 @@ class FsListingFilesService(ListingService):
         the archiveOrCategory value is an archive or category listing.
         """
         file= self._generate_listing_path('new', archiveOrCategory, 0, 0)
-        if if_modified_since and self._modified_since(if_modified_since, file):
+        updated = self._updated(file)  # for both the check and the cache
+        if if_modified_since and self._modified_since(
+                parsedate_to_datetime(if_modified_since), updated):
             return NotModifiedResponse(True, gen_expires())
         else:
-            rv =  parse_new_listing_file(file)
-            rv.listings = rv.listings[skip:skip + show] # Adjust for skip/show
-            return rv
+            rv = _cached_parse(file, updated, parse_new_listing_file, file)
+            # Adjust for skip/show on a copy, rv may be shared by the cache
+            return dataclasses.replace(rv, listings=_page_items(rv.listings, skip, show))
 
     def list_pastweek_articles(self,
                                archiveOrCategory: str,
@@ -296,12 +443,14 @@ class FsListingFilesService(ListingService):
         the archiveOrCategory value is an archive or category listing.
         """
         file = self._generate_listing_path('pastweek', archiveOrCategory, 0, 0)
-        if if_modified_since and self._modified_since(if_modified_since, file):
+        updated = self._updated(file)  # for both the check and the cache
+        if if_modified_since and self._modified_since(
+                parsedate_to_datetime(if_modified_since), updated):
             return NotModifiedResponse(True, gen_expires())
         else:
-            rv = parse_listing_pastweek(file)
-            rv.listings = rv.listings[skip:skip + show] # Adjust for skip/show
-            return rv
+            rv = _cached_parse(file, updated, parse_listing_pastweek, file)
+            # Adjust for skip/show on a copy, rv may be shared by the cache
+            return dataclasses.replace(rv, listings=_page_items(rv.listings, skip, show))
 
     def monthly_counts(self, archive: str, year: int) -> YearCount:
         """Gets monthly listing counts for the year."""
@@ -309,22 +458,22 @@ class FsListingFilesService(ListingService):
         new_cnt, cross_cnt = 0, 0
         currentYear, currentMonth, end_month = self._current_y_m_em(year)
 
-        files = []
-        for month in range(1, end_month + 1):
-            file = self._generate_listing_path('month', archive, year, month)
-            files.append((month, file, file.exists()))
+        def count(month_file: Tuple[int, FileObj]) -> MonthTotal:
+            month, file = month_file
+            # archive TODO Does this need archive?
+            # The files are from a list of the store so they exist
+            return _cached_parse(file, file.updated, count_updates_in_list_file,
+                                 year, month, file)
+
         month_totals=[]
-        for month, file, exists in files:
-            if not exists:
-                continue
-            response = get_updates_from_list_file(year, month, file, 'monthly_counts'
-                                                  # archive TODO Does this need archive?
-                                                  )
+        for response in _listing_pool.map(count,
+                                          self._month_files(archive, year, end_month)):
             if isinstance(response, MonthTotal):
                 monthly_counts.append(response)
                 new_cnt += response.new
                 cross_cnt += response.cross
-                month_totals.append(MonthCount(year,month,response.new,response.cross))
+                month_totals.append(MonthCount(year, response.month,
+                                               response.new, response.cross))
 
         year_resp=YearCount(year, new_cnt, cross_cnt,month_totals)
 
@@ -333,6 +482,13 @@ class FsListingFilesService(ListingService):
 
 
     def service_status(self)->List[str]:
+        checked, probs = _status_cache.get(self.document_listing_path, (0.0, []))
+        if time.monotonic() - checked > STATUS_CACHE_SEC:
+            probs = self._check_status()
+            _status_cache[self.document_listing_path] = (time.monotonic(), probs)
+        return probs
+
+    def _check_status(self)->List[str]:
         try:
             stat, msg = self.obj_store.status()
             if stat != "GOOD":
@@ -16,10 +16,11 @@ work for both.
 # TODO come back and fix up these type errors
 # mypy: disable-error-code="return,arg-type,assignment,attr-defined"
 import codecs
+from collections import deque
 import re
 from datetime import datetime
 import datetime as dt
-from typing import List, Literal, Tuple, Union
+from typing import List, Literal, Optional, Tuple, Union
 
 from arxiv.taxonomy.definitions import CATEGORIES
 from arxiv.taxonomy.category import create_bad_category
@@ -118,10 +119,13 @@ def get_updates_from_list_file(year:int, month: int, listingFilePath: FileObj,
     pub_dates:List[dt.date] = []
     pub_counts:List[int] = []
 
+    filter_re = re.compile(listingFilter) if listingFilter else None
+
     with listingFilePath.open('rb') as fh:
         data = fh.read()
 
-    lines = codecs.decode(data, encoding='utf-8',errors='ignore').split("\n")
+    # A deque since lines are taken from the front, pop(0) of a list is O(n)
+    lines = deque(codecs.decode(data, encoding='utf-8',errors='ignore').split("\n"))
 
 
     # Skip forward to first \\,
@@ -130,15 +134,15 @@ def get_updates_from_list_file(year:int, month: int, listingFilePath: FileObj,
     # /*Tue, 20 Jul 2021 */
     #\\
     #   or first update entry for monthly listing
-    line = lines.pop(0)
-    while (len(lines) and not re.match(r'^\\', line)):
-        line = lines.pop(0)
+    line = lines.popleft()
+    while (len(lines) and not line.startswith('\\')):
+        line = lines.popleft()
         line = line.replace('\n', '')
 
     # Now cycle through and process update entries in file
     type = 'new'
 
-    line = lines.pop(0)
+    line = lines.popleft()
     line = line.replace('\n', '')
     while (line):
         # check for special markup
@@ -147,7 +151,7 @@ def get_updates_from_list_file(year:int, month: int, listingFilePath: FileObj,
             if is_rule and type_change:
                 type = type_change
             if len(lines):
-                line = lines.pop(0)
+                line = lines.popleft()
             else:
                 break
             (is_rule, type_change) = _is_rule(line, type)
@@ -155,31 +159,32 @@ def get_updates_from_list_file(year:int, month: int, listingFilePath: FileObj,
                 break
 
         # Read up to the next \\
-        while (len(lines) and re.match(r'^\\', line)):
+        while (len(lines) and line.startswith('\\')):
             if len(lines):
-                line = lines.pop(0)
+                line = lines.popleft()
 
         # Now process all fields up to the next \\
         item_lines=[]
-        while (len(lines) and not re.match(r'^\\', line)):
+        while (len(lines) and not line.startswith('\\')):
             item_lines.append(line)
             if len(lines):
-                line = lines.pop(0)
+                line = lines.popleft()
                 line = line.replace('\n', '')
             else:
                 break
 
-        article, neworcross = _parse_item(item_lines)
+        # An item can only pass the filter if the filter is somewhere in its
+        # text, most items of a category listing are skipped without a summary
+        if filter_re is None or any(filter_re.search(l) for l in item_lines):
+            # Only the items being shown are parsed, see _ListingFileItem
+            arxiv_id, neworcross, primary, categories = _item_summary(item_lines)
 
-        # If we have id, register the update
-        #   apply filtering (if we are dealing with monthly listing)
-        if article:
-            primary = article.primary_category.id if article.primary_category else ''
-            if not listingFilter or (re.match(f'^{listingFilter}', primary)
+            # If we have id, register the update
+            #   apply filtering (if we are dealing with monthly listing)
+            if filter_re is None or (filter_re.match(primary)
                                      and neworcross == 'new' ):
                 # push update
-                item = ListingItem(id=article.arxiv_id, listingType=neworcross,
-                                   primary=primary, article=article)
+                item = _ListingFileItem(arxiv_id, neworcross, primary, item_lines)
                 if neworcross == 'new':
                     new_items.append(item)
                 elif neworcross == 'cross':
@@ -187,11 +192,10 @@ def get_updates_from_list_file(year:int, month: int, listingFilePath: FileObj,
                 elif neworcross =='rep':
                     rep_items.append(item)
 
-            elif listingFilter:
-                secondaries = ' '.join(article.categories.split()[1:]) # type: ignore
-                if re.search(listingFilter, secondaries):
-                    item = ListingItem(id=article.arxiv_id, listingType=neworcross,
-                                       primary=primary, article=article)
+            else:
+                secondaries = ' '.join(categories.split()[1:])
+                if filter_re.search(secondaries):
+                    item = _ListingFileItem(arxiv_id, neworcross, primary, item_lines)
                     cross_items.append(item)
 
         # From original parser
@@ -202,7 +206,7 @@ def get_updates_from_list_file(year:int, month: int, listingFilePath: FileObj,
         if new_type:
             type = new_type
         while len(lines) and not rule:
-            line = lines.pop(0)
+            line = lines.popleft()
             line = line.replace('\n', '')
             (rule, new_type) = _is_rule(line, type)
             if new_type:
@@ -210,7 +214,7 @@ def get_updates_from_list_file(year:int, month: int, listingFilePath: FileObj,
 
         # Read the next line for while loop
         if len(lines):
-            line = lines.pop(0)
+            line = lines.popleft()
             line = line.replace('\n', '')
         else:
             break
@@ -248,6 +252,30 @@ def get_updates_from_list_file(year:int, month: int, listingFilePath: FileObj,
 
 
 
+def count_updates_in_list_file(year: int, month: int, listingFilePath: FileObj)\
+        -> MonthTotal:
+    """Counts the new and cross listings in a monthly listing file.
+
+    This gets the same counts as `get_updates_from_list_file` with the
+    'monthly_counts' mode. It only looks at the first line of each item, which
+    has the ID and marks a cross listing, so no items are parsed and the
+    `listings` of the result is empty.
+    """
+    new, cross = 0, 0
+    after_slashes = False
+    with listingFilePath.open('rb') as fh:
+        for line in fh:
+            if after_slashes and line.startswith((b'Paper', b'arXiv:')):
+                if b'(*cross-listing*)' in line:
+                    cross += 1
+                else:
+                    new += 1
+            after_slashes = line.startswith(b'\\')
+
+    return MonthTotal(year=year, month=month, new=new, cross=cross,
+                      expires=gen_expires(), listings=[])
+
+
 RE_FROM_FIELD = re.compile(
     r'(?P<from>From:\s*)(?P<name>[^<]+)?\s+(<(?P<email>.*)>)?')
 RE_DATE_COMPONENTS = re.compile(
@@ -264,6 +292,65 @@ RE_ARXIV_ID_FROM_PREHISTORY = re.compile(
 RE_FIELDS=re.compile(r"^(?P<field_name>\S*):\s+(?P<value>.*?)(?=\n\S)", re.S|re.M)
 RE_CROSS = re.compile(r"\(\*cross-listing\*\)")
 
+RE_CATEGORIES_FIELD = re.compile(r"^Categories:\s+(?P<value>.*?)(?=\n\S)", re.S|re.M)
+
+
+class _ListingFileItem(ListingItem):
+    """A `ListingItem` that parses its `article` from the listing file when used.
+
+    A listing page only shows `show` items so most items of a month or year
+    listing are only counted and never need to be parsed."""
+
+    __slots__ = ('_item_lines', '_article')
+    _article: Optional[DocMetadata]
+
+    def __init__(self, id: str, listingType: str, primary: str,
+                 item_lines: List[str]):
+        self._item_lines = item_lines
+        super().__init__(id=id, listingType=listingType, primary=primary)
+
+    @property
+    def article(self) -> Optional[DocMetadata]:
+        if self._article is None and self._item_lines:
+            self._article, _ = _parse_item(self._item_lines)
+            self._item_lines = []
+        return self._article
+
+    @article.setter
+    def article(self, article: Optional[DocMetadata]) -> None:
+        self._article = article
+
+    def copy(self) -> ListingItem:
+        """Copies the item without parsing its `article`."""
+        item = _ListingFileItem(self.id, self.listingType, self.primary, self._item_lines)
+        item.article = self._article
+        return item
+
+
+def _item_summary(item_lines: List[str]) -> Tuple[str, str, str, str]:
+    """Gets `(arxiv_id, neworcross, primary, categories)` of an item.
+
+    These are the same as would be on the results of `_parse_item` but are
+    much quicker to get."""
+    raw = "\n".join(item_lines)
+    prehistory, misc_fields = re.split(r'\n\n', raw)
+
+    idm = re.search(RE_ARXIV_ID_FROM_PREHISTORY, prehistory)
+    arxiv_id = idm.group('arxiv_id') if idm else 'unknown-id'
+    neworcross = 'cross' if re.search(RE_CROSS, prehistory) else 'new'
+
+    catm = re.search(RE_CATEGORIES_FIELD, misc_fields)
+    categories = catm.group('value').replace('\n  ', ' ') if catm else ''
+    cats = categories.split()
+    if not categories:
+        primary = CATEGORIES["bad-arch.bad-cat"].id
+    elif cats[0] in CATEGORIES:
+        primary = CATEGORIES[cats[0]].id
+    else:
+        primary = create_bad_category(cats[0]).id
+    return arxiv_id, neworcross, primary, categories
+
+
 def _parse_item(item_lines: List[str]) -> Tuple[DocMetadata, str]:
     """EX
     arXiv:2301.01082
@@ -18,6 +18,7 @@ that indicate the date.
 # mypy: disable-error-code="return,arg-type,assignment,attr-defined"
 
 import codecs
+from collections import deque
 import re
 from datetime import datetime
 from typing import List, Literal, Tuple, Union
@@ -60,15 +61,16 @@ def parse_listing_pastweek(listingFilePath: FileObj)\
     with listingFilePath.open('rb') as fh:
         data = fh.read()
 
-    lines = codecs.decode(data, encoding='utf-8',errors='ignore').split("\n")
-    line = lines.pop(0).replace('\n','')
+    # A deque since lines are taken from the front, pop(0) of a list is O(n)
+    lines = deque(codecs.decode(data, encoding='utf-8',errors='ignore').split("\n"))
+    line = lines.popleft().replace('\n','')
     while(line):
         (is_rule, section_change) = _is_rule(line, section)
         while (is_rule):
             if is_rule and section_change:
                 section = section_change
             if len(lines):
-                line = lines.pop(0).replace('\n','')
+                line = lines.popleft().replace('\n','')
             else:
                 break
             (is_rule, section_change) = _is_rule(line, section)
@@ -76,16 +78,16 @@ def parse_listing_pastweek(listingFilePath: FileObj)\
                 break
 
         # consume any \\
-        while (len(lines) and re.match(r'^\\', line)):
-            line = lines.pop(0).replace('\n','')
+        while (len(lines) and line.startswith('\\')):
+            line = lines.popleft().replace('\n','')
 
         # Now accumulate all lines up to the next \\
         listing_lines: List[str] = []
         # Since the non-new listings don't have abstracts we don't have the
         # problem of // being in the abstract so we can just use the // delimiters.
-        while (len(lines) and not re.match(r'^\\', line)):
+        while (len(lines) and not line.startswith('\\')):
             listing_lines.append(line)
-            line = lines.pop(0).replace('\n','')
+            line = lines.popleft().replace('\n','')
 
 
         start_new_date = re.search(r"/\* (.*) \*/", " ".join(listing_lines))
@@ -106,14 +108,14 @@ def parse_listing_pastweek(listingFilePath: FileObj)\
         if new_section:
             section = new_section
         while len(lines) and not rule:
-            line = lines.pop(0).replace('\n','')
+            line = lines.popleft().replace('\n','')
             (rule, new_section) = _is_rule(line, section)
             if new_section:
                 section = new_section
 
         # Read the next line for while loop
         if len(lines):
-            line = lines.pop(0).replace('\n','')
+            line = lines.popleft().replace('\n','')
         else:
             break
 
@@ -0,0 +1,101 @@
+"""Streaming multipart/byteranges responses."""
+
+from typing import IO, Iterator, List, Optional, Tuple
+
+from arxiv.files import FileObj
+
+BUFFER_SIZE = 64 * 1024  # bytes
+
+MERGE_GAP = 80
+"""Ranges separated by fewer bytes than this are merged.
+
+The headers of a part are about this size so sending the gap is no worse than
+sending another part."""
+
+MAX_RANGES = 16
+"""Most parts sent in a multipart/byteranges response.
+
+PDF.js asks for about 4 to 8 ranges. Each part is a seek and a read, and on
+GS a seek outside the read buffer is another request, so a request for more
+ranges than this gets a single range that covers all of them."""
+
+
+def parse_ranges(range_header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parses a HTTP Range header into a list of satisfiable ranges.
+
+    Returns a list of `(start, end)` where `end` is inclusive, as in a
+    Content-Range header. The ranges are sorted and ranges that overlap or
+    are close together are merged. If there are more than `MAX_RANGES` after
+    merging, a single range from the first to the last is returned.
+
+    Returns `None` if the header is not a valid bytes range. Unsatisfiable
+    ranges are dropped so the list may be empty."""
+    unit, _, spec = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+
+    ranges: List[Tuple[int, int]] = []
+    for part in spec.split(','):
+        first, dash, last = part.strip().partition('-')
+        if not dash:
+            return None
+        try:
+            if not first:  # suffix range ex. bytes=-500
+                if not last:
+                    return None
+                start, end = max(size - int(last), 0), size - 1
+            else:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+        except ValueError:
+            return None
+        if start < 0 or (last and first and int(last) < start):
+            return None
+        if start <= end:
+            ranges.append((start, end))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + MERGE_GAP:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    if len(merged) > MAX_RANGES:
+        return [(merged[0][0], merged[-1][1])]
+    return merged
+
+
+def multipart_byteranges_gen(file: FileObj,
+                             ranges: List[Tuple[int, int]],
+                             content_type: str,
+                             boundary: str) -> Iterator[bytes]:
+    """Returns an `iterator[bytes]` over a multipart/byteranges body of
+    `ranges` of `file`.
+
+    `ranges` should be from `parse_ranges()`."""
+    size = file.size
+    with file.open('rb') as fh:
+        for start, end in ranges:
+            yield (f"\r\n--{boundary}\r\n"
+                   f"Content-Type: {content_type}\r\n"
+                   f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n").encode('ascii')
+            yield from _read_range(fh, start, end)
+    yield f"\r\n--{boundary}--\r\n".encode('ascii')
+
+
+def byterange_gen(file: FileObj, start: int, end: int) -> Iterator[bytes]:
+    """Returns an `iterator[bytes]` over the bytes `start` to `end`, inclusive,
+    of `file`."""
+    with file.open('rb') as fh:
+        yield from _read_range(fh, start, end)
+
+
+def _read_range(fh: IO[bytes], start: int, end: int) -> Iterator[bytes]:
+    fh.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        blk = fh.read(min(BUFFER_SIZE, remaining))
+        if not blk:
+            break
+        remaining -= len(blk)
+        yield blk
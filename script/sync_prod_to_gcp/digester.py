@@ -30,5 +30,9 @@ def digest_from_filepath(localfile: str, hasher=None) -> str:
 
 
 def get_file_mtime(localfile: str) -> str:
-    file_stat = os.stat(localfile)
+    return stat_mtime(os.stat(localfile))
+
+
+def stat_mtime(file_stat: os.stat_result) -> str:
+    """mtime of an already done stat in the same format as get_file_mtime."""
     return datetime.fromtimestamp(file_stat.st_mtime, tz=timezone.utc).isoformat()
@@ -13,7 +13,7 @@ import argparse
 import signal
 import sys
 import typing
-from time import gmtime, sleep
+from time import gmtime
 from pathlib import Path
 
 import json
@@ -21,10 +21,16 @@ import os
 import logging.handlers
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from google.cloud.pubsub_v1.subscriber.message import Message
 from google.cloud.pubsub_v1 import SubscriberClient
-from google.cloud.storage import Client as StorageClient
+from google.cloud.pubsub_v1.subscriber.scheduler import ThreadScheduler
+from google.cloud.pubsub_v1.types import FlowControl
+
+# browse is in the repo root, its GS client only needs the google and requests packages
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from browse.services.gs_client import get_storage_client
 
 from identifier import Identifier
 from sync_published_to_gcp import ORIG_PREFIX, FTP_PREFIX, upload, ArxivSyncJsonFormatter, \
@@ -60,16 +66,14 @@ def submission_message_to_payloads(message: Message, log_extra: dict, testing: b
     testing: bool - skips the fstat call on file system. This is for testing the payloads.
     See test/test_subscribe_submissions.py.
     """
+    # json.loads takes the bytes directly, UnicodeDecodeError is a ValueError so it goes first
     try:
-        json_str = message.data.decode('utf-8')
+        data = json.loads(message.data)
     except UnicodeDecodeError:
-        logger.error(f"bad data {str(message.message_id)}", extra=log_extra)
+        logger.error("bad data %s", message.message_id, extra=log_extra)
         return ("", [])
-
-    try:
-        data = json.loads(json_str)
-    except Exception as _exc:
-        logger.warning(f"bad({message.message_id}): {json_str[:1024]}", extra=log_extra)
+    except ValueError:
+        logger.warning("bad(%s): %s", message.message_id, message.data[:1024], extra=log_extra)
         return ("", [])
 
     publish_type = data.get('type') # cross | jref | new | rep | wdr
@@ -105,13 +109,14 @@ def submission_message_to_payloads(message: Message, log_extra: dict, testing: b
     archive = ('arxiv' if not xid_latest.is_old_id else xid_latest.archive)
     pairs = []
 
-    latest_dir = f"{FTP_PREFIX}{archive}/papers/{xid_latest.yymm}"
+    latest_prefix = f"{FTP_PREFIX}{archive}/papers/{xid_latest.yymm}/{xid_latest.filename}"
+    latest_key_prefix = path_to_bucket_key(latest_prefix)
     for dotext in [abs_ext] + submission_exts:
-        src_path = f"{latest_dir}/{xid_latest.filename}{dotext}"
+        src_path = latest_prefix + dotext
         # As mentioned in the doc string, by skipping the os.path.exist, you can test the
         # payload src (CIT) / dest (Bucket) pairs.
         if testing or os.path.exists(src_path):
-            pairs.append((src_path, path_to_bucket_key(src_path)))
+            pairs.append((src_path, latest_key_prefix + dotext))
             # When there is a source, stop looking for more. For majority of case, this would
             # eliminate the extra fstat on the file system.
             if dotext != abs_ext:
@@ -126,13 +131,15 @@ def submission_message_to_payloads(message: Message, log_extra: dict, testing: b
         prev_version = 1
         try:
             prev_version = max(1, int(version) - 1)
-        except:
+        except (TypeError, ValueError):
+            # version missing or not a number
             pass
-        versioned_parent = f"{ORIG_PREFIX}{archive}/papers/{xid_latest.yymm}"
+        prev_prefix = f"{ORIG_PREFIX}{archive}/papers/{xid_latest.yymm}/{xid_latest.filename}v{prev_version}"
+        prev_key_prefix = path_to_bucket_key(prev_prefix)
         for dotext in [abs_ext] + submission_exts:
-            src_path = f"{versioned_parent}/{xid_latest.filename}v{prev_version}{dotext}"
+            src_path = prev_prefix + dotext
             if testing or os.path.exists(src_path):
-                pairs.append((src_path, path_to_bucket_key(src_path)))
+                pairs.append((src_path, prev_key_prefix + dotext))
                 if dotext != abs_ext:
                     break
             else:
@@ -141,48 +148,64 @@ def submission_message_to_payloads(message: Message, log_extra: dict, testing: b
     return (xid_latest.ids, pairs)
 
 
-class ThreadLocalData:
-    def __init__(self):
-        self._local = threading.local()
+CALLBACK_WORKERS = 8
+"""Threads running submission_callback"""
+
+MAX_OUTSTANDING_MESSAGES = CALLBACK_WORKERS * 2
+"""Messages leased at once.
+
+Enough for each callback thread to have the next message ready without holding, and
+extending the leases of, the client's default of 1000 messages."""
+
+UPLOAD_WORKERS = 16
+"""Threads for uploading the files of the messages.
+
+A message has up to 4 files (abs and source, and the previous version's for rep/wdr)
+which are uploaded in parallel. The pool is shared by all the callback threads."""
+
+_upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+STORAGE_POOL_MAXSIZE = UPLOAD_WORKERS + CALLBACK_WORKERS
+"""Connections the storage client keeps open to GS.
+
+Both the upload and the callback threads use the shared client, with the default of 10
+connections they would wait on the pool or churn connections."""
 
-    @property
-    def storage(self):
-        if not hasattr(self._local, 'storage'):
-            # Initialize the Storage instance for the current thread
-            self._local.storage = StorageClient()
-        return self._local.storage
 
-mydata = ThreadLocalData()
 
 def submission_callback(message: Message) -> None:
     """Pub/sub event handler to upload the submission tarball and .abs files to GCP."""
-    # Create a thread-local object
-    gs_client = mydata.storage
+    gs_client = get_storage_client(STORAGE_POOL_MAXSIZE)
     log_extra = {"message_id": str(message.message_id), "app": "pubsub"}
     arxiv_id_str, payloads = submission_message_to_payloads(message, log_extra)
     if not arxiv_id_str:
-        logger.error(f"bad data {str(message.message_id)}", extra=log_extra)
+        logger.error("bad data %s", message.message_id, extra=log_extra)
         message.nack()
         return
     if not payloads:
-        logger.warning(f"There is no associated files? xid: {arxiv_id_str}, mid: {str(message.message_id)}", extra=log_extra)
+        logger.warning("There is no associated files? xid: %s, mid: %s", arxiv_id_str, message.message_id,
+                       extra=log_extra)
         message.nack()
         return
-    xid = Identifier(arxiv_id_str)
+    # arxiv_id_str is already the parsed Identifier's ids, no need to parse it again
     log_extra["arxiv_id"] = arxiv_id_str
     logger.info("Processing %s", arxiv_id_str, extra=log_extra)
 
     try:
+        uploads = []
         for local, remote in payloads:
             logger.debug("uploading: %s -> %s", local, remote, extra=log_extra)
-            upload(gs_client, Path(local), remote, upload_logger=logger)
+            uploads.append(_upload_pool.submit(upload, gs_client, Path(local), remote, upload_logger=logger))
+        # Wait for all of them, an error from any of them nacks the message
+        for uploading in uploads:
+            uploading.result()
 
         # Acknowledge the message so it is not re-sent
-        logger.info("ack message: %s", xid.ids, extra=log_extra)
+        logger.info("ack message: %s", arxiv_id_str, extra=log_extra)
         message.ack()
 
     except Exception as exc:
-        logger.error("Error processing message: {exc}", exc_info=True, extra=log_extra)
+        logger.error("Error processing message: %s", exc, exc_info=True, extra=log_extra)
         message.nack()
 
 
@@ -192,17 +215,17 @@ def test_callback(message: Message) -> None:
     arxiv_id_str, payloads = submission_message_to_payloads(message, log_extra)
     logger.debug(arxiv_id_str)
     for payload in payloads:
-        logger.debug(f"{payload[0]} -> {payload[1]}")
+        logger.debug("%s -> %s", payload[0], payload[1])
     message.nack()
     sys.exit(0)
 
 
-running = True
+shutdown_event = threading.Event()
+"""Set by the signal handler, the main thread waits on it instead of polling"""
 
 def signal_handler(_signal: int, _frame: typing.Any):
     """Graceful shutdown request"""
-    global running
-    running = False
+    shutdown_event.set()
 
 # Attach the signal handler
 signal.signal(signal.SIGINT, signal_handler)
@@ -221,13 +244,16 @@ def submission_pull_messages(project_id: str, subscription_id: str, test: bool =
     subscriber_client = SubscriberClient()
     subscription_path = subscriber_client.subscription_path(project_id, subscription_id)
     callback = test_callback if test else submission_callback
-    streaming_pull_future = subscriber_client.subscribe(subscription_path, callback=callback)
+    scheduler = ThreadScheduler(executor=ThreadPoolExecutor(max_workers=CALLBACK_WORKERS,
+                                                            thread_name_prefix="callback"))
+    streaming_pull_future = subscriber_client.subscribe(
+        subscription_path, callback=callback, scheduler=scheduler,
+        flow_control=FlowControl(max_messages=MAX_OUTSTANDING_MESSAGES))
     log_extra = {"app": "pubsub"}
     logger.info("Starting %s %s", project_id, subscription_id, extra=log_extra)
     with subscriber_client:
         try:
-            while running:
-                sleep(0.2)
+            shutdown_event.wait()
             streaming_pull_future.cancel()  # Trigger the shutdown
             streaming_pull_future.result(timeout=30)  # Block until the shutdown is complete
         except TimeoutError:
@@ -47,7 +47,7 @@ from google.cloud.storage.retry import DEFAULT_RETRY as STORAGE_RETRY
 
 from identifier import Identifier
 
-from digester import get_file_mtime
+from digester import stat_mtime
 
 overall_start = perf_counter()
 
@@ -106,6 +106,9 @@ ENSURE_CERT_VERIFY = False
 PDF_WAIT_SEC = 60 * 5
 """Maximum sec to wait for a PDF to be created"""
 
+CONSUME_CHUNK_SIZE = 64 * 1024
+"""Bytes per read when discarding a /pdf or /html response body"""
+
 todo_q: Queue = Queue()
 uploaded_q: Queue = Queue()  # number of files uploaded
 summary_q: Queue = Queue()
@@ -173,6 +176,7 @@ def make_todos(filename, generate=True) -> List[dict]:
     cross_r = re.compile(r" cross for (.*)")
     jref_r = re.compile(r" journal ref for (.*)")
     test_r = re.compile(r" Test Submission\. Skipping\.")
+    move_r = re.compile(r"^.* Moved (.*) => (.*)$", re.MULTILINE)
 
     todo = []
 
@@ -213,20 +217,20 @@ def make_todos(filename, generate=True) -> List[dict]:
         """Makes actions for replacement.
 
         Don't try to move on the GCP, just sync to GCP so it is idempotent."""
-        move_r = re.compile(r"^.* Moved (.*) => (.*)$", re.MULTILINE)
         return [('upload', m.group(2)) for m in move_r.finditer(txt)]
 
     sub_start_r = re.compile(r".* submission (\d*)$")
     sub_end_r = re.compile(r".*Finished processing submission ")
-    subs, in_sub, txt, sm = [], False, '', None
+    # lines of the submission are collected in a list and joined once since
+    # concatenating each line to the str is quadratic
+    subs, in_sub, lines, sm = [], False, [], None
     with open(filename) as fh:
-        for line in fh.readlines():
+        for line in fh:
             if in_sub:
+                lines.append(line)
                 if sm is not None and sub_end_r.match(line):
-                    subs.append((sm.group(1), txt + line))
-                    txt, sm, in_sub = '', None, False
-                else:
-                    txt = txt + line
+                    subs.append((sm.group(1), ''.join(lines)))
+                    lines, sm, in_sub = [], None, False
             else:
                 sm = sub_start_r.match(line)
                 if sm:
@@ -275,22 +279,26 @@ def path_to_bucket_key(pdf) -> str:
     """Handels both source and cache files. Should handle pdfs, abs, txt
     and other types of files under these directories. Bucket key should
     not start with a /"""
-    if str(pdf).startswith(CACHE_PREFIX):
-        return str(pdf).replace(CACHE_PREFIX, '')
-    elif str(pdf).startswith(DATA_PREFIX):
-        return str(pdf).replace(DATA_PREFIX, '')
+    path = str(pdf)
+    if path.startswith(CACHE_PREFIX):
+        return path[len(CACHE_PREFIX):]
+    elif path.startswith(DATA_PREFIX):
+        return path[len(DATA_PREFIX):]
     else:
         logging.error(f"path_to_bucket_key: {pdf} does not start with {CACHE_PREFIX} or {DATA_PREFIX}")
         raise ValueError(f"Cannot convert PDF path {pdf} to a GS key")
     
 def path_to_bucket_key_html(html) -> str:
-    if str(html).startswith(CACHE_PREFIX):
-        return str(html).replace(CACHE_PREFIX, '')
-    elif str(html).startswith(DATA_PREFIX):
-        return str(html).replace(DATA_PREFIX, '')
-    else:
-        logging.error(f"path_to_bucket_key: {html} does not start with {CACHE_PREFIX} or {DATA_PREFIX}")
-        raise ValueError(f"Cannot convert PDF path {html} to a GS key")
+    return path_to_bucket_key(html)
+
+def _consume(resp) -> None:
+    """Reads and discards the body so the connection goes back to the session's pool.
+
+    The body is the PDF or HTML which is not needed, so it is read in large blocks
+    rather than being split into lines that are kept in a list."""
+    for _ in resp.iter_content(chunk_size=CONSUME_CHUNK_SIZE):
+        pass
+
 
 @retry.Retry(predicate=retry.if_exception_type(HTML_RETRY_EXCEPTIONS))
 def get_html(session, html_url) -> None:
@@ -298,8 +306,7 @@ def get_html(session, html_url) -> None:
     headers = {'User-Agent': ENSURE_UA}
     logger.debug("Getting %s", html_url)
     resp = session.get(html_url, headers=headers, stream=True, verify=ENSURE_CERT_VERIFY)
-    # noinspection PyStatementEffect
-    [line for line in resp.iter_lines()]  # Consume resp in hopes of keeping alive session
+    _consume(resp)
     html_ms: int = ms_since(start)
     if resp.status_code == 503:
         msg = f"ensure_pdf: GET status 503, server overloaded {html_url}"
@@ -325,8 +332,7 @@ def get_pdf(session, pdf_url) -> None:
     headers = {'User-Agent': ENSURE_UA}
     logger.debug("Getting %s", pdf_url)
     resp = session.get(pdf_url, headers=headers, stream=True, verify=ENSURE_CERT_VERIFY)
-    # noinspection PyStatementEffect
-    [line for line in resp.iter_lines()]  # Consume resp in hopes of keeping alive session
+    _consume(resp)
     pdf_ms: int = ms_since(start)
     if resp.status_code == 503:
         msg = f"ensure_pdf: GET status 503, server overloaded {pdf_url}"
@@ -368,7 +374,7 @@ def ensure_pdf(session, host, arxiv_id, timeout=None):
     start = perf_counter()
 
     if pdf_file.exists():
-        logger.debug(f"ensure_file_url_exists: {str(pdf_file)} already exists")
+        logger.debug("ensure_file_url_exists: %s already exists", pdf_file)
         return pdf_file, url, "already exists", ms_since(start)
 
     start = perf_counter()
@@ -415,7 +421,7 @@ def ensure_html(session, host, arxiv_id: Identifier):
     files = _get_files_for_html(str(html_path))
 
     if len(files) > 0:
-        logger.debug(f"ensure_file_url_exists: {str(html_path)} has files")
+        logger.debug("ensure_file_url_exists: %s has files", html_path)
         return files, url, "already exists", ms_since(start)
 
     start = perf_counter()
@@ -460,23 +466,25 @@ def upload(gs_client, localpath, key, upload_logger=None):
 
     start = perf_counter()
 
+    # stat once, the size and mtime are needed for the compare, the metadata and the result
+    file_stat = localpath.stat()
     bucket = gs_client.bucket(GS_BUCKET)
     blob = bucket.get_blob(key)
-    if blob is None or blob.size != localpath.stat().st_size or key in REUPLOADS:
+    if blob is None or blob.size != file_stat.st_size or key in REUPLOADS:
         destination = bucket.blob(key)
         with open(localpath, 'rb') as fh:
 
             destination.upload_from_file(fh, content_type=mime_from_fname(localpath))
-            upload_logger.debug(
-                f"upload: completed upload of {localpath} to gs://{GS_BUCKET}/{key} of size {localpath.stat().st_size}")
+            upload_logger.debug("upload: completed upload of %s to gs://%s/%s of size %d",
+                                localpath, GS_BUCKET, key, file_stat.st_size)
         try:
-            destination.metadata = {"localpath": localpath, "mtime": get_file_mtime(localpath)}
+            destination.metadata = {"localpath": localpath, "mtime": stat_mtime(file_stat)}
             destination.update()
         except BaseException:
-            upload_logger.error(f"upload: could not set time on GS object gs://{GS_BUCKET}/{key}", exc_info=True)
-        return "upload", localpath, key, "uploaded", ms_since(start), localpath.stat().st_size
+            upload_logger.error("upload: could not set time on GS object gs://%s/%s", GS_BUCKET, key, exc_info=True)
+        return "upload", localpath, key, "uploaded", ms_since(start), file_stat.st_size
     else:
-        upload_logger.debug(f"upload: Not uploading {localpath}, gs://{GS_BUCKET}/{key} already on gs")
+        upload_logger.debug("upload: Not uploading %s, gs://%s/%s already on gs", localpath, GS_BUCKET, key)
         return "upload", localpath, key, "already_on_gs", ms_since(start), 0
 
 
@@ -7,11 +7,12 @@ This is done using the function ensure_pdf() from sync_published_to_gcp.
 The request (pub/sub entry) is subsumed when the pdf exists, so this is a pretty safe operation.
 """
 import argparse
+import itertools
 import signal
 import threading
 import typing
 from pathlib import Path
-from time import gmtime, sleep
+from time import gmtime
 
 import json
 import os
@@ -41,13 +42,22 @@ LOG_FORMAT_KWARGS = {
     # time.strftime has no %f code "datefmt": "%Y-%m-%dT%H:%M:%S.%fZ%z",
 }
 
-MESSAGE_COUNT = 0  # Set this to negative to shutdown
+shutdown_event = threading.Event()
+"""Set by the signal handler, the main thread waits on it instead of polling"""
+
+WEBNODE_TICKETS = itertools.count()
+"""Picks the web node for a message round robin.
+
+next() on a count is atomic so concurrent callbacks get different tickets, unlike the
+read-modify-write of a global counter."""
+
+AUTO_IGNORE = b"%auto-ignore"
+"""Start of a single file source that is not to be compiled"""
 
 
 def signal_handler(_signal: int, _frame: typing.Any):
     """Graceful shutdown request"""
-    global MESSAGE_COUNT
-    MESSAGE_COUNT = -99999 # Just a very negative int
+    shutdown_event.set()
 
 
 # Attach the signal handler
@@ -60,8 +70,8 @@ class ThreadedSession:
 
     @property
     def session(self):
-        if not hasattr(self._local, 'storage'):
-            # Initialize the Storage instance for the current thread
+        if not hasattr(self._local, 'session'):
+            # Initialize the Session for the current thread, it is reused for every message
             self._local.session = requests.Session()
         return self._local.session
 
@@ -76,32 +86,26 @@ def subscribe_published(project_id: str, subscription_id: str, request_timeout:
         subscription_id (str): ID of the Pub/Sub subscription
         request_timeout: request timeout
     """
-    global MESSAGE_COUNT
-
     def ping_callback(message: Message) -> None:
         """Pub/sub event handler to upload the submission tarball and .abs files to GCP.
         Note that, this is running in a thread driven by the gcp pub/sub client.
         """
-        global MESSAGE_COUNT
-        my_tag = MESSAGE_COUNT
-        log_extra = {"service": "ping_webnode", "count": MESSAGE_COUNT}
-        if my_tag < 0:
+        my_tag = next(WEBNODE_TICKETS) % len(CONCURRENCY_PER_WEBNODE)
+        log_extra = {"service": "ping_webnode", "count": my_tag}
+        if shutdown_event.is_set():
             logger.info("shutting down", extra=log_extra)
             message.nack()
             return
-        MESSAGE_COUNT = (MESSAGE_COUNT + 1) % len(CONCURRENCY_PER_WEBNODE)
 
+        # json.loads takes the bytes directly, UnicodeDecodeError is a ValueError so it goes first
         try:
-            json_str = message.data.decode('utf-8')
+            data = json.loads(message.data)
         except UnicodeDecodeError:
-            logger.error(f"bad data {str(message.message_id)}", extra=log_extra)
+            logger.error("bad data %s", message.message_id, extra=log_extra)
             message.nack()
             return
-
-        try:
-            data = json.loads(json_str)
-        except Exception as _exc:
-            logger.warning(f"bad({message.message_id}): {json_str[:1024]}", extra=log_extra)
+        except ValueError:
+            logger.warning("bad(%s): %s", message.message_id, message.data[:1024], extra=log_extra)
             return
 
         #publish_type = data.get('type') # cross | jref | new | rep | wdr
@@ -114,7 +118,7 @@ def subscribe_published(project_id: str, subscription_id: str, request_timeout:
 
         # If the message is totally bogus, nothing I can do. Error it out
         if not paper_id:
-            logger.error(f"bad data {str(message.message_id)}", extra=log_extra)
+            logger.error("bad data %s", message.message_id, extra=log_extra)
             message.nack()
             return
 
@@ -127,7 +131,8 @@ def subscribe_published(project_id: str, subscription_id: str, request_timeout:
 
         arxiv_id = Identifier(arxiv_id_str)
         archive = ('arxiv' if not arxiv_id.is_old_id else arxiv_id.archive)
-        pdf_source = Path(f"{FTP_PREFIX}/{archive}/papers/{arxiv_id.yymm}/{arxiv_id.filename}.pdf")
+        source_prefix = f"{FTP_PREFIX}/{archive}/papers/{arxiv_id.yymm}/{arxiv_id.filename}"
+        pdf_source = Path(source_prefix + ".pdf")
         # PDF submissions - move on
         if pdf_source.exists():
             logger.info("ack message - PDF submission: %s ext %s",
@@ -136,13 +141,12 @@ def subscribe_published(project_id: str, subscription_id: str, request_timeout:
             return
 
         # Ignored submission
-        gz_source = Path(f"{FTP_PREFIX}/{archive}/papers/{arxiv_id.yymm}/{arxiv_id.filename}.gz")
+        gz_source = Path(source_prefix + ".gz")
         if gz_source.exists():
-            # Open the gzip file in read mode with text encoding set to ASCII
+            # Only the start of the source is needed, don't decompress and decode the whole file
             try:
-                with gzip.open(gz_source, 'rt', encoding='ascii') as f:
-                    content = f.read()
-                    if content.startswith("%auto-ignore"):
+                with gzip.open(gz_source, 'rb') as f:
+                    if f.read(len(AUTO_IGNORE)) == AUTO_IGNORE:
                         logger.info("ack message - auto-ignore: %s ext %s",
                               arxiv_id_str, str(src_ext), extra=log_extra)
                         message.ack()
@@ -153,12 +157,12 @@ def subscribe_published(project_id: str, subscription_id: str, request_timeout:
                                exc_info=True, stack_info=False)
 
         # Removed submission
-        tgz_source = Path(f"{FTP_PREFIX}/{archive}/papers/{arxiv_id.yymm}/{arxiv_id.filename}.tar.gz")
+        tgz_source = Path(source_prefix + ".tar.gz")
         if tgz_source.exists():
             try:
-                with tarfile.open(tgz_source, 'r:gz') as submission:
-                    toplevels = submission.getnames()
-                    if "removed.txt" in toplevels:
+                # Stream the members rather than building the index of the whole tar
+                with tarfile.open(tgz_source, 'r|gz') as submission:
+                    if any(member.name == "removed.txt" for member in submission):
                         logger.info("ack message - removed submission: %s ext %s",
                               arxiv_id_str, str(src_ext), extra=log_extra)
                         message.ack()
@@ -167,7 +171,7 @@ def subscribe_published(project_id: str, subscription_id: str, request_timeout:
                 logger.warning("bad tgz: %s", arxiv_id.ids, extra=log_extra,
                                exc_info=True, stack_info=False)
 
-        host, n_para = CONCURRENCY_PER_WEBNODE[min(len(CONCURRENCY_PER_WEBNODE)-1, max(0, my_tag))]
+        host, n_para = CONCURRENCY_PER_WEBNODE[my_tag]
         try:
             pdf_file, url, _1, duration_ms = ensure_pdf(thread_data.session, host, arxiv_id, timeout=30)
             if pdf_file.exists():
@@ -190,8 +194,7 @@ def subscribe_published(project_id: str, subscription_id: str, request_timeout:
     logger.info("Starting %s %s", project_id, subscription_id, extra=log_extra)
     with subscriber_client:
         try:
-            while MESSAGE_COUNT >= 0:
-                sleep(0.2)
+            shutdown_event.wait()
             streaming_pull_future.cancel()  # Trigger the shutdown
             streaming_pull_future.result(timeout=30)  # Block until the shutdown is complete
         except TimeoutError:
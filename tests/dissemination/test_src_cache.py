@@ -0,0 +1,43 @@
+import flask
+from arxiv.identifier import Identifier
+from arxiv.files.object_store import LocalObjectStore
+
+from browse.services.dissemination.source_store import SourceStore
+from browse.services.dissemination import get_article_store
+
+
+def test_get_src_cached_for_request(app_with_test_fs, mocker):
+    with app_with_test_fs.test_request_context():
+        sstore: SourceStore = get_article_store().sourcestore
+        list_spy = mocker.spy(sstore, '_list_src')
+
+        src = sstore.get_src(Identifier('1601.04345'), True)
+        assert src is not None and src.name.endswith('1601.04345.tar.gz')
+        assert sstore.get_src(Identifier('1601.04345'), True) is src
+        assert list_spy.call_count == 1
+
+        flask.g.pop('_src_cache')
+        assert sstore.get_src(Identifier('1601.04345'), True).name == src.name
+        assert list_spy.call_count == 2
+
+
+def test_get_src_not_cached_without_request(app_with_test_fs, mocker):
+    with app_with_test_fs.app_context():
+        sstore: SourceStore = get_article_store().sourcestore
+        list_spy = mocker.spy(sstore, '_list_src')
+        sstore.get_src(Identifier('1601.04345'), True)
+        sstore.get_src(Identifier('1601.04345'), True)
+        assert list_spy.call_count == 2
+
+
+def test_get_src_key_order(tmp_path):
+    papers = tmp_path / 'ftp' / 'arxiv' / 'papers' / '2101'
+    papers.mkdir(parents=True)
+    for name in ['2101.00001.tar.gz', '2101.00001.pdf', '2101.00001.abs']:
+        (papers / name).write_bytes(b'fake')
+
+    sstore = SourceStore(LocalObjectStore(f"{tmp_path}/"))
+    src = sstore.get_src(Identifier('2101.00001'), True)
+    assert src is not None and src.name.endswith('2101.00001.pdf'), \
+        "the source is the first in key order, as a GS list returns them"
+    assert sstore.get_src(Identifier('2101.00002'), True) is None
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from browse.services.listing import Listing
+from browse.services.listing.fs_listings import FsListingFilesService
+
+
+def test_cached_items_not_shared(abs_path):
+    """The controllers modify the items of a page so each call must get its own."""
+    fsls = FsListingFilesService(str(abs_path / "ftp"))
+    first = fsls.list_articles_by_month("astro-ph", 8, 1, 0, 5)
+    assert isinstance(first, Listing)
+    first.listings[0].list_index = 1
+    first.listings[0].article = None
+
+    second = fsls.list_articles_by_month("astro-ph", 8, 1, 0, 5)
+    assert isinstance(second, Listing)
+    assert second.count == first.count
+    assert [item.id for item in second.listings] == [item.id for item in first.listings]
+    assert second.listings[0] is not first.listings[0]
+    assert not hasattr(second.listings[0], 'list_index')
+    assert second.listings[0].article is not None
+
+
+def test_current_y_m_em(abs_path):
+    fsls = FsListingFilesService(str(abs_path / "ftp"))
+    now = datetime.now()
+    yy, mm = now.year % 100, now.month
+
+    assert fsls._current_y_m_em(yy) == (yy, mm, mm), "current year is limited to the current month"
+    assert fsls._current_y_m_em(now.year) == (yy, mm, mm), "4 digit current year"
+    assert fsls._current_y_m_em((yy - 1) % 100) == (yy, mm, 12), "past year has all months"
+    assert fsls._current_y_m_em(now.year - 1) == (yy, mm, 12), "4 digit past year"
+    assert fsls._current_y_m_em(1999) == (yy, mm, 12)
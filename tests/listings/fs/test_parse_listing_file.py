@@ -1,7 +1,8 @@
 from pathlib import Path
 
-from browse.services.listing import Listing
-from browse.services.listing.parse_listing_file import get_updates_from_list_file, _parse_item
+from browse.services.listing import Listing, MonthTotal
+from browse.services.listing.parse_listing_file import get_updates_from_list_file, _parse_item, \
+    count_updates_in_list_file
 
 ASTRO_LISTS = "ftp/astro-ph/listings"
 
@@ -64,6 +65,20 @@ def test_astroph_9204(abs_path):
     assert item.id == "astro-ph/9204001"
     assert item.listingType == 'new'
     assert item.primary == "astro-ph"
+    assert item.article.arxiv_id == "astro-ph/9204001"
+    assert item.article.title == "Gamma-Ray Bursts as the Death Throes of Massive Binary Stars"
+
+
+def test_count_updates(abs_path):
+    files = list( (abs_path / ASTRO_LISTS).glob("./[0-9]*"))
+    assert files
+    for file in files:
+        yy = file.stem[0:2]
+        mm = file.stem[2:4]
+        parsed = get_updates_from_list_file(yy, mm, file, "monthly_counts")
+        counts = count_updates_in_list_file(yy, mm, file)
+        assert isinstance(counts, MonthTotal)
+        assert (counts.new, counts.cross) == (parsed.new, parsed.cross), f"counts of {file}"
 
 
 def test_parse_item():
@@ -0,0 +1,52 @@
+"""Tests browse.stream.byteranges."""
+from arxiv.files import MockStringFileObj
+from browse.stream.byteranges import MAX_RANGES, MERGE_GAP, parse_ranges, multipart_byteranges_gen
+
+
+def test_parse_ranges():
+    assert parse_ranges("bytes=0-99", 1000) == [(0, 99)]
+    assert parse_ranges("bytes=0-99,500-599", 1000) == [(0, 99), (500, 599)]
+    assert parse_ranges("bytes=500-599, 0-99", 1000) == [(0, 99), (500, 599)]
+    assert parse_ranges("bytes=-100", 1000) == [(900, 999)]
+    assert parse_ranges("bytes=900-", 1000) == [(900, 999)]
+    assert parse_ranges("bytes=900-5000", 1000) == [(900, 999)]
+
+
+def test_parse_ranges_merge():
+    assert parse_ranges("bytes=0-99,50-150", 1000) == [(0, 150)]
+    assert parse_ranges("bytes=0-99,110-200", 1000) == [(0, 200)]
+    assert parse_ranges("bytes=0-99,-10,995-", 1000) == [(0, 99), (990, 999)]
+
+
+def test_parse_ranges_max():
+    step = MERGE_GAP + 10
+    spec = ",".join(f"{i * step}-{i * step}" for i in range(MAX_RANGES))
+    assert len(parse_ranges(f"bytes={spec}", 100000)) == MAX_RANGES
+
+    spec = ",".join(f"{i * step}-{i * step}" for i in range(MAX_RANGES + 1))
+    assert parse_ranges(f"bytes={spec}", 100000) == [(0, MAX_RANGES * step)], \
+        "too many ranges are sent as one covering range"
+
+
+def test_parse_ranges_bad():
+    assert parse_ranges("0-1", 1000) is None
+    assert parse_ranges("items=0-1", 1000) is None
+    assert parse_ranges("bytes=a-b", 1000) is None
+    assert parse_ranges("bytes=10-5", 1000) is None
+    assert parse_ranges("bytes=5000-6000", 1000) == []
+
+
+def test_multipart_byteranges_gen():
+    data = "".join(str(i % 10) for i in range(1000))
+    fileobj = MockStringFileObj("fake.pdf", data)
+    body = b"".join(multipart_byteranges_gen(fileobj, [(0, 9), (500, 504)],
+                                             "application/pdf", "BOUNDARY"))
+    assert body == (b"\r\n--BOUNDARY\r\n"
+                    b"Content-Type: application/pdf\r\n"
+                    b"Content-Range: bytes 0-9/1000\r\n\r\n"
+                    b"0123456789"
+                    b"\r\n--BOUNDARY\r\n"
+                    b"Content-Type: application/pdf\r\n"
+                    b"Content-Range: bytes 500-504/1000\r\n\r\n"
+                    b"01234"
+                    b"\r\n--BOUNDARY--\r\n")
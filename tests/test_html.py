@@ -1,3 +1,6 @@
+from arxiv.files import LocalFileObj
+
+
 def test_html_paper(client_with_test_fs):
     """Test a paper with html source."""
     resp = client_with_test_fs.head("/abs/2403.10561")
@@ -82,3 +85,32 @@ def test_html_headers(client_with_test_fs):
     assert 'Content-Type' in resp.headers
     content_type = resp.headers.get('Content-Type', '')
     assert content_type== "text/html; charset=utf-8"
+
+
+def test_latexml_html_small(client_with_test_fs, mocker, tmp_path):
+    """Test that a small LaTeXML HTML file is sent with a Content-Length and not chunked."""
+    html = b"<html><body>Content-Based Image Retrieval</body></html>"
+    (tmp_path / "1208.6335v2.html").write_bytes(html)
+    store = mocker.patch('browse.services.dissemination.article_store._latexml_store')
+    store.return_value.to_obj.return_value = LocalFileObj(tmp_path / "1208.6335v2.html")
+
+    resp = client_with_test_fs.get("/html/1208.6335v2")
+    assert resp.status_code == 200
+    assert resp.headers["Content-Length"] == str(len(html))
+    assert "Transfer-Encoding" not in resp.headers
+    assert resp.data == html
+
+    resp = client_with_test_fs.head("/html/1208.6335v2")
+    assert resp.status_code == 200
+    assert resp.headers["Content-Length"] == str(len(html))
+    assert resp.data == b""
+
+    resp = client_with_test_fs.get("/html/1208.6335v2", headers={"Range": "bytes=6-11"})
+    assert resp.status_code == 206
+    assert resp.data == html[6:12]
+
+    mocker.patch('browse.controllers.files.dissemination.SMALL_RESPONSE_SIZE', 10)
+    resp = client_with_test_fs.get("/html/1208.6335v2")
+    assert resp.status_code == 200
+    assert resp.headers["Transfer-Encoding"] == "chunked"
+    assert resp.data == html
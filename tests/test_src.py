@@ -112,3 +112,89 @@ def test_wdr_current_src(client_with_test_fs):
 
     resp = client_with_test_fs.get("/html/2310.08262")
     assert resp.status_code == 404
+
+
+SRC_1601 = "tests/data/abs_files/ftp/arxiv/papers/1601/1601.04345.tar.gz"
+
+
+def _src_1601_bytes() -> bytes:
+    with open(SRC_1601, "rb") as fh:
+        return fh.read()
+
+
+def test_src_multiple_ranges(client_with_test_fs):
+    data = _src_1601_bytes()
+    resp = client_with_test_fs.get("/src/1601.04345v2", headers={"Range": "bytes=0-9,1000-1009"})
+    assert resp.status_code == 206
+    mime, _, boundary = resp.headers["Content-Type"].partition("; boundary=")
+    assert mime == "multipart/byteranges" and boundary
+    assert "Content-Length" not in resp.headers  # streamed as chunked
+    assert resp.headers["Transfer-Encoding"] == "chunked"
+    assert resp.headers["Accept-Ranges"] == "bytes"
+
+    parts = resp.data.split(f"\r\n--{boundary}".encode())
+    assert parts[0] == b"" and parts[-1] == b"--\r\n"
+    for part, (start, end) in zip(parts[1:-1], [(0, 9), (1000, 1009)]):
+        headers, _, body = part.partition(b"\r\n\r\n")
+        assert f"Content-Range: bytes {start}-{end}/{len(data)}".encode() in headers
+        assert body == data[start:end + 1]
+
+
+def test_src_merged_ranges(client_with_test_fs):
+    """Ranges that overlap are sent as a single range not a multipart."""
+    data = _src_1601_bytes()
+    resp = client_with_test_fs.get("/src/1601.04345v2", headers={"Range": "bytes=0-9,5-19"})
+    assert resp.status_code == 206
+    assert resp.headers["Content-Range"] == f"bytes 0-19/{len(data)}"
+    assert resp.headers["Content-Length"] == "20"
+    assert resp.data == data[:20]
+
+
+def test_src_single_range(client_with_test_fs):
+    data = _src_1601_bytes()
+    resp = client_with_test_fs.get("/src/1601.04345v2", headers={"Range": "bytes=100-199"})
+    assert resp.status_code == 206
+    assert resp.headers["Content-Range"] == f"bytes 100-199/{len(data)}"
+    assert resp.data == data[100:200]
+
+
+def test_src_if_range(client_with_test_fs):
+    data = _src_1601_bytes()
+    head = client_with_test_fs.head("/src/1601.04345v2")
+    ranges = {"Range": "bytes=0-9,1000-1009"}
+
+    resp = client_with_test_fs.get("/src/1601.04345v2", headers={**ranges, "If-Range": head.headers["ETag"]})
+    assert resp.status_code == 206
+    resp = client_with_test_fs.get("/src/1601.04345v2",
+                                   headers={**ranges, "If-Range": head.headers["Last-Modified"]})
+    assert resp.status_code == 206
+
+    resp = client_with_test_fs.get("/src/1601.04345v2", headers={**ranges, "If-Range": '"changed"'})
+    assert resp.status_code == 200, "the file changed so all of it must be sent"
+    assert resp.data == data
+    resp = client_with_test_fs.get("/src/1601.04345v2",
+                                   headers={**ranges, "If-Range": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert resp.status_code == 200
+    assert resp.data == data
+
+
+def test_src_local_file(client_with_test_fs):
+    """A large local file is passed to the WSGI file_wrapper and sent chunked."""
+    data = _src_1601_bytes()
+    resp = client_with_test_fs.get("/src/1601.04345v2")
+    assert resp.status_code == 200
+    assert resp.headers["Transfer-Encoding"] == "chunked"
+    assert "Content-Length" not in resp.headers
+    assert resp.headers["Accept-Ranges"] == "bytes"
+    assert resp.data == data
+
+    resp = client_with_test_fs.head("/src/1601.04345v2")
+    assert resp.status_code == 200
+    assert resp.headers["Content-Length"] == str(len(data))
+    assert "Transfer-Encoding" not in resp.headers
+    assert resp.data == b""
+
+    resp = client_with_test_fs.get("/src/1601.04345v2", headers={"Range": f"bytes={len(data) - 10}-"})
+    assert resp.status_code == 206
+    assert resp.headers["Content-Range"] == f"bytes {len(data) - 10}-{len(data) - 1}/{len(data)}"
+    assert resp.data == data[-10:]